@@ -1,5 +1,5 @@
 import aiosqlite
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class SubscriptionDB:
     """База данных для хранения информации о подписках на каналы"""
@@ -45,6 +45,17 @@ class SubscriptionDB:
             wait_time INTEGER DEFAULT 0
         )
         ''')
+        await conn.execute('''
+        CREATE TABLE IF NOT EXISTS auto_checkpoints (
+            phone TEXT NOT NULL,
+            bot_username TEXT NOT NULL,
+            message_id INTEGER,
+            fingerprint TEXT,
+            wait_until REAL DEFAULT 0,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY(phone, bot_username)
+        )
+        ''')
         await conn.commit()
     
     async def add_subscription(self, phone: str, channel_url: str, channel_name: str = None) -> bool:
@@ -197,6 +208,72 @@ class SubscriptionDB:
             print(f"Ошибка при получении всех подписок: {e}")
             return []
     
+    async def save_checkpoint(self, phone: str, bot_username: str, message_id: Optional[int],
+                              fingerprint: str = None, wait_until: float = 0) -> bool:
+        """
+        Сохранение состояния автоматического режима
+        
+        Args:
+            phone: Номер телефона пользователя
+            bot_username: Username бота
+            message_id: ID текущего сообщения бота (None - оставить сохраненный)
+            fingerprint: Отпечаток последнего полностью обработанного сообщения (None - оставить сохраненный)
+            wait_until: Время окончания блокировки подписок (секунды с начала эпохи)
+            
+        Returns:
+            bool: True если успешно сохранено
+        """
+        try:
+            conn = await self._get_connection()
+            await conn.execute(
+                '''
+                INSERT INTO auto_checkpoints (phone, bot_username, message_id, fingerprint, wait_until)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(phone, bot_username) DO UPDATE SET
+                    message_id = COALESCE(excluded.message_id, message_id),
+                    fingerprint = COALESCE(excluded.fingerprint, fingerprint),
+                    wait_until = excluded.wait_until,
+                    timestamp = CURRENT_TIMESTAMP
+                ''',
+                (phone, bot_username, message_id, fingerprint, wait_until)
+            )
+            await conn.commit()
+            return True
+        except Exception as e:
+            print(f"Ошибка при сохранении состояния: {e}")
+            return False
+    
+    async def get_checkpoint(self, phone: str, bot_username: str) -> Optional[Dict[str, Any]]:
+        """
+        Получение сохраненного состояния автоматического режима
+        
+        Args:
+            phone: Номер телефона пользователя
+            bot_username: Username бота
+            
+        Returns:
+            Optional[Dict]: Состояние или None, если оно не сохранялось
+        """
+        try:
+            conn = await self._get_connection()
+            cursor = await conn.execute(
+                'SELECT message_id, fingerprint, wait_until FROM auto_checkpoints WHERE phone = ? AND bot_username = ?',
+                (phone, bot_username)
+            )
+            row = await cursor.fetchone()
+            
+            if not row:
+                return None
+            
+            return {
+                'message_id': row[0],
+                'fingerprint': row[1],
+                'wait_until': row[2] or 0
+            }
+        except Exception as e:
+            print(f"Ошибка при получении состояния: {e}")
+            return None
+    
     async def close(self):
         """Закрытие соединения с базой данных"""
         if self._connection:
@@ -1,4 +1,4 @@
-from telethon import TelegramClient, events, functions
+from telethon import TelegramClient, events, functions, utils
 from telethon.tl.types import User, Chat, Channel
 from telethon.tl.types import KeyboardButton, KeyboardButtonCallback, ReplyInlineMarkup
 from typing import Optional, List, Dict, Any
@@ -6,6 +6,7 @@ from .config import APP_ID, APP_HASH
 from .db import SubscriptionDB
 from .subscription_manager import ChannelSubscriptionManager
 import asyncio
+import hashlib
 import random
 import re
 import time
@@ -35,6 +36,9 @@ class BotHandler:
         self.global_wait_until = 0  
         self.subscription_blocked = False  
         self.processing_lock = False  
+        self.auto_bot_username = None  
+        self.last_processed_fingerprint = None  
+        self.resume_task = None  
         self.sub_manager = ChannelSubscriptionManager(self)
 
     async def init(self):
@@ -256,47 +260,68 @@ class BotHandler:
             await self.init()
             
             
-            print("[АВТО] Поиск бота @gram_piarbot в диалогах...")
-            dialogs = await self.client.get_dialogs()
+            checkpoint = await self.db.get_checkpoint(self.phone, "gram_piarbot")
             gram_piarbot = None
             
-            for dialog in dialogs:
-                entity = dialog.entity
-                if isinstance(entity, User) and entity.username == "gram_piarbot":
-                    gram_piarbot = entity
-                    break
+            # При наличии сохраненного состояния бот берется из кеша сессии, без перебора диалогов
+            if checkpoint and checkpoint['message_id']:
+                try:
+                    gram_piarbot = await self.client.get_input_entity("gram_piarbot")
+                except Exception as e:
+                    print(f"[АВТО] Ошибка при получении бота @gram_piarbot: {e}")
             
             if not gram_piarbot:
-                print("[АВТО] Бот @gram_piarbot не найден в диалогах!")
-                return False
+                print("[АВТО] Поиск бота @gram_piarbot в диалогах...")
+                dialogs = await self.client.get_dialogs()
+                
+                for dialog in dialogs:
+                    entity = dialog.entity
+                    if isinstance(entity, User) and entity.username == "gram_piarbot":
+                        gram_piarbot = entity
+                        break
+                
+                if not gram_piarbot:
+                    print("[АВТО] Бот @gram_piarbot не найден в диалогах!")
+                    return False
+                
+                print(f"[АВТО] Найден бот: {gram_piarbot.first_name} (@{gram_piarbot.username})")
             
             self.selected_bot = gram_piarbot
-            print(f"[АВТО] Найден бот: {gram_piarbot.first_name} (@{gram_piarbot.username})")
-            
-            
-            print("[АВТО] Отправляем команду /start...")
-            await self.client.send_message(gram_piarbot, '/start')
-            print("[АВТО] Команда /start отправлена, ожидаем ответ...")
+            self.auto_bot_username = "gram_piarbot"
+            gram_piarbot_id = utils.get_peer_id(gram_piarbot)
             
             
-            response_received = False
+            response_received = asyncio.Event()
             
             
-            @self.client.on(events.NewMessage(chats=[gram_piarbot.id]))
+            @self.client.on(events.NewMessage(chats=[gram_piarbot_id]))
             async def auto_handle_message(event):
-                nonlocal response_received
-                response_received = True
+                response_received.set()
                 await self.auto_handle_bot_response(event)
             
             
-            @self.client.on(events.MessageEdited(chats=[gram_piarbot.id]))
+            @self.client.on(events.MessageEdited(chats=[gram_piarbot_id]))
             async def auto_handle_edited_message(event):
                 await self.auto_handle_bot_response(event)
             
             
-            await asyncio.sleep(5)
+            if checkpoint and await self.resume_from_checkpoint(gram_piarbot, checkpoint):
+                print("[АВТО] Автоматический режим возобновлен для @gram_piarbot")
+                await self.client.run_until_disconnected()
+                return True
+            
+            
+            print("[АВТО] Отправляем команду /start...")
+            await self.client.send_message(gram_piarbot, '/start')
+            print("[АВТО] Команда /start отправлена, ожидаем ответ...")
             
-            if not response_received:
+            
+            try:
+                await asyncio.wait_for(response_received.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+            
+            if not response_received.is_set():
                 print("[АВТО] Нет ответа на /start, возможно язык уже выбран. Отправляем '👨‍💻 Заработать'...")
                 await self.client.send_message(gram_piarbot, '👨‍💻 Заработать')
                 print("[АВТО] Сообщение '👨‍💻 Заработать' отправлено")
@@ -315,9 +340,101 @@ class BotHandler:
         for btn in buttons:
             print(f"ROW: {btn.get('row')} COL: {btn.get('column')} TEXT: {btn.get('text')} TYPE: {btn.get('type')} URL: {btn.get('url', '')}")
 
+    def message_fingerprint(self, message) -> str:
+        """Отпечаток сообщения: ID, текст и кнопки"""
+        parts = [str(message.id), message.message or '']
+        for btn in self.extract_buttons(message):
+            parts.append(f"{btn.get('row')}:{btn.get('column')}:{btn.get('text')}:{btn.get('url', '')}")
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    async def save_checkpoint(self, message_id: Optional[int] = None, fingerprint: Optional[str] = None):
+        """Сохранить состояние автоматического режима в БД (без message_id сохраненный ID не меняется)"""
+        if not self.auto_bot_username:
+            return
+        
+        if message_id is None and self.last_message is not None:
+            message_id = self.last_message.id
+        if fingerprint is not None:
+            self.last_processed_fingerprint = fingerprint
+        
+        wait_until = self.global_wait_until if self.subscription_blocked else 0
+        await self.db.save_checkpoint(
+            self.phone,
+            self.auto_bot_username,
+            message_id,
+            fingerprint=self.last_processed_fingerprint,
+            wait_until=wait_until
+        )
+
+    async def set_subscription_cooldown(self, wait_seconds: int):
+        """Установить глобальную блокировку подписок и сохранить ее в БД"""
+        self.subscription_blocked = True
+        self.global_wait_until = time.time() + wait_seconds
+        print(f"[АВТО] Установлена глобальная блокировка подписок до {time.strftime('%H:%M:%S', time.localtime(self.global_wait_until))}")
+        await self.save_checkpoint()
+
+    async def resume_from_checkpoint(self, bot, checkpoint: Dict[str, Any]) -> bool:
+        """Возобновить обработку с сохраненного сообщения вместо повторного /start"""
+        if not checkpoint['message_id']:
+            return False
+        
+        self.last_processed_fingerprint = checkpoint['fingerprint']
+        if checkpoint['wait_until'] > time.time():
+            self.global_wait_until = checkpoint['wait_until']
+            self.subscription_blocked = True
+            print(f"[АВТО] Восстановлена блокировка подписок до {time.strftime('%H:%M:%S', time.localtime(self.global_wait_until))}")
+        
+        try:
+            message = await self.client.get_messages(bot, ids=checkpoint['message_id'])
+        except Exception as e:
+            print(f"[АВТО] Ошибка при получении сохраненного сообщения: {e}")
+            return False
+        
+        if not message:
+            print("[АВТО] Сохраненное сообщение не найдено, начинаем сначала")
+            return False
+        
+        if self.message_fingerprint(message) == self.last_processed_fingerprint:
+            print("[АВТО] Сохраненное сообщение уже обработано, начинаем сначала")
+            return False
+        
+        # Каналы, на которые подписались до перезапуска, повторно не обрабатываем
+        for subscription in await self.db.get_all_subscriptions(self.phone):
+            self.subscribed_channels.add(subscription['channel_url'])
+        
+        print(f"[АВТО] Возобновляем обработку с сообщения {message.id}")
+        self.resume_task = asyncio.ensure_future(self._resume_message(message))
+        self.resume_task.add_done_callback(self._on_resume_done)
+        return True
+
+    async def _resume_message(self, message):
+        """Дождаться восстановленной блокировки и обработать сохраненное сообщение"""
+        remaining_time = self.global_wait_until - time.time()
+        if self.subscription_blocked and remaining_time > 0:
+            print(f"[АВТО] Ожидание окончания блокировки подписок: {int(remaining_time)} секунд")
+            await asyncio.sleep(remaining_time)
+        await self.auto_process_message(message)
+
+    def _on_resume_done(self, task: asyncio.Task):
+        """Вывести ошибку фоновой обработки сохраненного сообщения"""
+        if not task.cancelled() and task.exception():
+            print(f"[АВТО] Ошибка при возобновлении обработки: {task.exception()}")
+
     async def auto_handle_bot_response(self, event):
         """Упрощённая автоматическая обработка сообщений (без подписок)"""
-        message = event.message
+        await self.auto_process_message(event.message)
+
+    async def auto_process_message(self, message):
+        """Обработка сообщения бота с сохранением состояния до и после"""
+        await self.save_checkpoint(message.id)
+        handled = await self._auto_process_message(message)
+        # Необработанное сообщение (блокировка, нет подходящих кнопок) нужно повторить после перезапуска,
+        # а если пока шла обработка пришло более новое сообщение - его не перезаписываем
+        if handled and self.last_message is not None and self.last_message.id == message.id:
+            await self.save_checkpoint(message.id, fingerprint=self.message_fingerprint(message))
+
+    async def _auto_process_message(self, message) -> bool:
+        """Выбор действия по кнопкам сообщения. Возвращает True, если сообщение обработано"""
         buttons = self.extract_buttons(message)
         self.last_message = message
         self.last_buttons = buttons
@@ -325,29 +442,27 @@ class BotHandler:
         # Если появились кнопки каналов – выводим структуру и выходим
         if any(btn.get('type') == 'url' and ('t.me/' in btn.get('url', '') or 'telegram.me/' in btn.get('url', '')) for btn in buttons):
             self._print_channel_buttons(buttons)
-            await self.sub_manager.process_channel_buttons(buttons)
-            return
+            return await self.sub_manager.process_channel_buttons(buttons)
 
         # Автовыбор языка
         for i, btn in enumerate(buttons):
             if 'русский' in btn.get('text', '').lower():
                 await asyncio.sleep(2)
-                await self.click_button(i)
-                return
+                return await self.click_button(i)
 
         # Кнопка "Заработать"
         for i, btn in enumerate(buttons):
             if 'заработать' in btn.get('text', '').lower() or '👨‍💻' in btn.get('text', ''):
                 await asyncio.sleep(2)
-                await self.click_button(i)
-                return
+                return await self.click_button(i)
 
         # Кнопка "Подписаться на канал"
         for i, btn in enumerate(buttons):
             if 'подписаться' in btn.get('text', '').lower() and 'канал' in btn.get('text', '').lower() and btn.get('type') == 'callback':
                 await asyncio.sleep(2)
-                await self.click_button(i)
-                return
+                return await self.click_button(i)
+
+        return False
 
     async def handle_channel_subscriptions(self, buttons: List[Dict[str, Any]]):
         """Автоматическая подписка на каналы и проверка подписки"""
@@ -37,8 +37,8 @@ class ChannelSubscriptionManager:
                 return
             elif self.subscription_blocked and current_time >= self.global_wait_until:
                 print(f"[АВТО] Время блокировки истекло, снимаем блокировку подписок")
-                self.subscription_blocked = False
-                self.global_wait_until = 0
+                self.bot.subscription_blocked = False
+                self.bot.global_wait_until = 0
 
             channel_check_pairs = []
             navigation_buttons = []
@@ -118,10 +118,8 @@ class ChannelSubscriptionManager:
 
                         if wait_seconds > 0:
                             print(f"[АВТО] Обнаружено временное ограничение на подписки на {wait_seconds} секунд")
-                            self.global_wait_until = time.time() + wait_seconds
-                            self.subscription_blocked = True
+                            await self.set_subscription_cooldown(wait_seconds)
                             self.subscription_processing = False
-                            print(f"[АВТО] Установлена глобальная блокировка подписок до {time.strftime('%H:%M:%S', time.localtime(self.global_wait_until))}")
                             return
                         continue
                     else:
@@ -187,8 +185,8 @@ class ChannelSubscriptionManager:
                 return
             elif self.subscription_blocked and current_time >= self.global_wait_until:
                 print(f"[АВТО] Время блокировки истекло, снимаем блокировку подписок")
-                self.subscription_blocked = False
-                self.global_wait_until = 0
+                self.bot.subscription_blocked = False
+                self.bot.global_wait_until = 0
 
             check_button_indices = []
             for i, btn in enumerate(check_buttons):
@@ -300,12 +298,6 @@ class ChannelSubscriptionManager:
                 print(f"[АВТО] Ошибка при подписке на канал {channel_name}: {join_error}")
                 self.subscribed_channels.add(url)
                 if 'wait' in error_str.lower():
-                    wait_match = re.search(r'wait of (\d+) seconds', error_str)
-                    if wait_match:
-                        wait_seconds = int(wait_match.group(1))
-                        print(f"[АВТО] Установка глобальной блокировки на {wait_seconds} секунд")
-                        self.subscription_blocked = True
-                        self.global_wait_until = time.time() + wait_seconds
                     return error_str
                 return False
         except Exception as e:
@@ -349,18 +341,21 @@ class ChannelSubscriptionManager:
             print(f"[АВТО] Ошибка при извлечении хеша приглашения: {e}")
             return None
 
-    async def process_channel_buttons(self, buttons: List[Dict[str, Any]]):
-        """Подписаться на каналы (левая колонка), затем проверка (правая)."""
+    async def process_channel_buttons(self, buttons: List[Dict[str, Any]]) -> bool:
+        """Подписаться на каналы (левая колонка), затем проверка (правая).
+
+        Возвращает False, если страница пропущена из-за блокировки подписок.
+        """
         
         current_time = time.time()
         if self.subscription_blocked and current_time < self.global_wait_until:
             remaining_time = int(self.global_wait_until - current_time)
             print(f"[АВТО] Подписки заблокированы еще на {remaining_time} секунд, пропускаем обработку")
-            return
+            return False
         elif self.subscription_blocked and current_time >= self.global_wait_until:
             print(f"[АВТО] Время блокировки истекло, снимаем блокировку подписок")
-            self.subscription_blocked = False
-            self.global_wait_until = 0
+            self.bot.subscription_blocked = False
+            self.bot.global_wait_until = 0
 
         
         rows = {}
@@ -401,6 +396,7 @@ class ChannelSubscriptionManager:
                 if wait_match:
                     wait_sec = int(wait_match.group(1)) + 5
                     print(f"⏳ Ожидание {wait_sec} сек. из-за лимита")
+                    await self.set_subscription_cooldown(wait_sec)
                     await asyncio.sleep(wait_sec)
                     
                     continue
@@ -417,4 +413,6 @@ class ChannelSubscriptionManager:
             print("[АВТО] Все каналы уже обработаны, завершаем")
             self.subscription_processing = False
             self.last_subscription_message = None
-            self.last_subscription_buttons = None 
\ No newline at end of file
+            self.last_subscription_buttons = None
+
+        return True 
\ No newline at end of file
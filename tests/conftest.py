@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+os.environ.setdefault("APP_ID", "1")
+os.environ.setdefault("APP_HASH", "test")
+
+
+@pytest.fixture(autouse=True)
+def _workdir(tmp_path, monkeypatch):
+    """Файлы сессии и БД создаются во временной папке"""
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,280 @@
+import asyncio
+import time
+
+from telethon.tl.types import InputPeerUser
+
+from bot.handler import BotHandler
+
+PHONE = "+70000000000"
+BOT_USERNAME = "gram_piarbot"
+
+
+class FakeMessage:
+    def __init__(self, message_id, text="", reply_markup=None):
+        self.id = message_id
+        self.message = text
+        self.reply_markup = reply_markup
+
+
+class FakeUrlButton:
+    def __init__(self, text, url):
+        self.text = text
+        self.url = url
+
+
+class FakeRow:
+    def __init__(self, buttons):
+        self.buttons = buttons
+
+
+class FakeMarkup:
+    def __init__(self, rows):
+        self.rows = [FakeRow(row) for row in rows]
+
+
+def channel_page(message_id, url):
+    return FakeMessage(message_id, "Подпишитесь на канал", FakeMarkup([[FakeUrlButton("Канал", url)]]))
+
+
+BOT_PEER = InputPeerUser(user_id=1001, access_hash=1)
+
+
+class FakeClient:
+    """Клиент без сети: get_messages отдает заданные сообщения, запросы падают с FloodWait"""
+
+    def __init__(self, messages=None, error="A wait of 100 seconds is required"):
+        self.messages = messages or {}
+        self.error = error
+        self.requested_ids = []
+        self.requests = []
+        self.dialogs_requested = False
+
+    async def get_messages(self, entity, ids=None):
+        self.requested_ids.append(ids)
+        return self.messages.get(ids)
+
+    async def get_entity(self, username):
+        return object()
+
+    async def get_input_entity(self, username):
+        return BOT_PEER
+
+    async def get_dialogs(self):
+        self.dialogs_requested = True
+        return []
+
+    def on(self, event):
+        return lambda handler: handler
+
+    async def run_until_disconnected(self):
+        pass
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        raise Exception(self.error)
+
+
+async def make_handler(client=None):
+    handler = BotHandler(PHONE, "test_session")
+    handler.client.session.close()
+    handler.client = client or FakeClient()
+    handler.auto_bot_username = BOT_USERNAME
+    await handler.init()
+    return handler
+
+
+def test_checkpoint_round_trip():
+    async def scenario():
+        handler = await make_handler()
+        handler.subscription_blocked = True
+        handler.global_wait_until = 12345.0
+        await handler.save_checkpoint(42, fingerprint="abc")
+        checkpoint = await handler.db.get_checkpoint(PHONE, BOT_USERNAME)
+        await handler.db.close()
+        return checkpoint
+
+    assert asyncio.run(scenario()) == {'message_id': 42, 'fingerprint': 'abc', 'wait_until': 12345.0}
+
+
+def test_checkpoint_without_message_keeps_saved_message_id():
+    async def scenario():
+        handler = await make_handler()
+        await handler.save_checkpoint(42, fingerprint="abc")
+        handler.subscription_blocked = True
+        handler.global_wait_until = 999.0
+        await handler.save_checkpoint()
+        checkpoint = await handler.db.get_checkpoint(PHONE, BOT_USERNAME)
+        await handler.db.close()
+        return checkpoint
+
+    assert asyncio.run(scenario()) == {'message_id': 42, 'fingerprint': 'abc', 'wait_until': 999.0}
+
+
+def test_flood_wait_from_sub_manager_is_saved_once(monkeypatch):
+    saved_wait_until = []
+
+    async def scenario():
+        handler = await make_handler()
+        await handler.save_checkpoint(7)
+
+        save_checkpoint = handler.db.save_checkpoint
+
+        async def counting_save_checkpoint(*args, **kwargs):
+            saved_wait_until.append(kwargs['wait_until'])
+            return await save_checkpoint(*args, **kwargs)
+
+        async def fake_sleep(seconds):
+            pass
+
+        monkeypatch.setattr(handler.db, "save_checkpoint", counting_save_checkpoint)
+        monkeypatch.setattr("bot.subscription_manager.asyncio.sleep", fake_sleep)
+        buttons = [{'row': 0, 'column': 0, 'text': 'Канал', 'type': 'url', 'url': 'https://t.me/some_channel'}]
+        await handler.sub_manager.process_channel_buttons(buttons)
+        checkpoint = await handler.db.get_checkpoint(PHONE, BOT_USERNAME)
+        await handler.db.close()
+        return handler, checkpoint
+
+    started = time.time()
+    handler, checkpoint = asyncio.run(scenario())
+    assert handler.subscription_blocked
+    assert len(saved_wait_until) == 1
+    assert checkpoint['message_id'] == 7
+    assert checkpoint['wait_until'] >= started + 105
+
+
+def test_flood_wait_is_saved_before_sleep(monkeypatch):
+    saved_before_sleep = []
+
+    async def scenario():
+        handler = await make_handler(FakeClient(error="A wait of 60 seconds is required"))
+        await handler.save_checkpoint(7)
+
+        async def fake_sleep(seconds):
+            checkpoint = await handler.db.get_checkpoint(PHONE, BOT_USERNAME)
+            saved_before_sleep.append((seconds, checkpoint['wait_until']))
+
+        monkeypatch.setattr("bot.subscription_manager.asyncio.sleep", fake_sleep)
+        buttons = [{'row': 0, 'column': 0, 'text': 'Канал', 'type': 'url', 'url': 'https://t.me/+invitehash'}]
+        await handler.sub_manager.process_channel_buttons(buttons)
+        await handler.db.close()
+
+    started = time.time()
+    asyncio.run(scenario())
+    seconds, wait_until = saved_before_sleep[0]
+    assert seconds == 65
+    assert wait_until >= started + 65
+
+
+def test_resume_processes_saved_message():
+    async def scenario():
+        url = "https://t.me/some_channel"
+        message = channel_page(42, url)
+        client = FakeClient({42: message})
+        handler = await make_handler(client)
+        await handler.db.add_subscription(PHONE, url, "Канал")
+        await handler.save_checkpoint(42)
+        resumed = await handler.resume_from_checkpoint(BOT_PEER, await handler.db.get_checkpoint(PHONE, BOT_USERNAME))
+        await handler.resume_task
+        checkpoint = await handler.db.get_checkpoint(PHONE, BOT_USERNAME)
+        await handler.db.close()
+        return handler, client, message, resumed, checkpoint
+
+    handler, client, message, resumed, checkpoint = asyncio.run(scenario())
+    assert resumed
+    assert client.requested_ids == [42]
+    assert handler.last_message is message
+    assert checkpoint['fingerprint'] == handler.message_fingerprint(message)
+
+
+def test_resume_restores_active_cooldown():
+    async def scenario():
+        handler = await make_handler(FakeClient({42: FakeMessage(42)}))
+        handler.subscription_blocked = True
+        handler.global_wait_until = time.time() + 300
+        await handler.save_checkpoint(42)
+        await handler.db.close()
+
+        restarted = await make_handler(FakeClient({42: FakeMessage(42)}))
+        resumed = await restarted.resume_from_checkpoint(BOT_PEER, await restarted.db.get_checkpoint(PHONE, BOT_USERNAME))
+        restarted.resume_task.cancel()
+        await restarted.db.close()
+        return restarted, resumed
+
+    restarted, resumed = asyncio.run(scenario())
+    assert resumed
+    assert restarted.subscription_blocked
+    assert restarted.global_wait_until > time.time() + 200
+
+
+def test_resume_falls_back_when_message_is_gone():
+    async def scenario():
+        handler = await make_handler(FakeClient())
+        await handler.save_checkpoint(42)
+        resumed = await handler.resume_from_checkpoint(BOT_PEER, await handler.db.get_checkpoint(PHONE, BOT_USERNAME))
+        await handler.db.close()
+        return resumed
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_resume_falls_back_when_message_already_processed():
+    async def scenario():
+        message = FakeMessage(42, "Готово")
+        handler = await make_handler(FakeClient({42: message}))
+        await handler.save_checkpoint(42, fingerprint=handler.message_fingerprint(message))
+        resumed = await handler.resume_from_checkpoint(BOT_PEER, await handler.db.get_checkpoint(PHONE, BOT_USERNAME))
+        await handler.db.close()
+        return resumed
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_message_skipped_during_cooldown_is_not_marked_processed():
+    async def scenario():
+        handler = await make_handler()
+        await handler.save_checkpoint(41, fingerprint="previous")
+        handler.subscription_blocked = True
+        handler.global_wait_until = time.time() + 300
+        message = channel_page(42, "https://t.me/some_channel")
+        await handler.auto_process_message(message)
+        checkpoint = await handler.db.get_checkpoint(PHONE, BOT_USERNAME)
+        await handler.db.close()
+        return handler, checkpoint
+
+    handler, checkpoint = asyncio.run(scenario())
+    assert checkpoint['message_id'] == 42
+    assert checkpoint['fingerprint'] == "previous"
+
+
+def test_resume_skips_channels_joined_before_restart():
+    async def scenario():
+        url = "https://t.me/some_channel"
+        client = FakeClient({42: channel_page(42, url)})
+        handler = await make_handler(client)
+        await handler.db.add_subscription(PHONE, url, "Канал")
+        await handler.save_checkpoint(42)
+        resumed = await handler.resume_from_checkpoint(BOT_PEER, await handler.db.get_checkpoint(PHONE, BOT_USERNAME))
+        await handler.resume_task
+        await handler.db.close()
+        return client, resumed
+
+    client, resumed = asyncio.run(scenario())
+    assert resumed
+    assert client.requests == []
+
+
+def test_sequence_resumes_without_dialog_scan():
+    async def scenario():
+        client = FakeClient({42: FakeMessage(42, "Страница заданий")})
+        handler = await make_handler(client)
+        await handler.save_checkpoint(42)
+        handler.auto_bot_username = None
+        result = await handler.auto_gram_piarbot_sequence()
+        await handler.resume_task
+        await handler.db.close()
+        return client, result
+
+    client, result = asyncio.run(scenario())
+    assert result
+    assert not client.dialogs_requested
+    assert client.requested_ids == [42]